@@ -1,12 +1,15 @@
 """Command-line interface for llll."""
 
-import argparse
-import json
-import sys
+import functools
 from pathlib import Path
 
 
-def init_workspace(detect: bool = False, hub_name: str | None = None) -> int:
+def init_workspace(
+    detect: bool = False,
+    hub_name: str | None = None,
+    fresh: bool = False,
+    assume_yes: bool = False,
+) -> int:
     """Initialize a workspace for llll MCP integration.
 
     Creates:
@@ -16,6 +19,8 @@ def init_workspace(detect: bool = False, hub_name: str | None = None) -> int:
     Args:
         detect: Whether to run hub detection immediately
         hub_name: Hub name for detection (optional)
+        fresh: Ignore any cached detection result and query the hub
+        assume_yes: Answer yes to all confirmation prompts
 
     Returns:
         Exit code (0 = success)
@@ -30,8 +35,7 @@ def init_workspace(detect: bool = False, hub_name: str | None = None) -> int:
     mcp_config_path = cwd / ".mcp.json"
     if mcp_config_path.exists():
         print("⚠️  .mcp.json already exists")
-        response = input("Overwrite? [y/N]: ").strip().lower()
-        if response != "y":
+        if not _confirm("Overwrite? [y/N]: ", assume_yes=assume_yes):
             print("Skipping .mcp.json creation")
         else:
             _create_mcp_json(mcp_config_path, cwd)
@@ -46,10 +50,12 @@ def init_workspace(detect: bool = False, hub_name: str | None = None) -> int:
         print()
         try:
             import asyncio
-            from . import config, discover
+            from . import config, discover, firmware
 
             async def run_detect():
-                data = await discover.run_discovery(cwd, hub_name=hub_name)
+                data = await discover.run_discovery(
+                    cwd, hub_name=hub_name, fresh=fresh
+                )
 
                 if "error" in data:
                     print(f"❌ Detection failed: {data['error']}")
@@ -65,9 +71,31 @@ def init_workspace(detect: bool = False, hub_name: str | None = None) -> int:
                 print()
                 print(summary)
                 print()
+                if data.get("cached"):
+                    print(
+                        "Using cached detection result from .llll_cache/ "
+                        "(use --fresh to query the hub again)."
+                    )
+                else:
+                    print("Detection result cached in .llll_cache/ for 5 minutes.")
+                print()
+
+                # Warm the firmware update cache so 'llll flash --check' is instant
+                hub = cfg["hubs"][0]
+                update_info = await firmware.cached_check_update_available(
+                    hub.get("pybricks_version") or "unknown",
+                    hub["type"],
+                )
+                if update_info.get("available"):
+                    print(
+                        f"⚠️  Firmware update available: "
+                        f"{update_info['current']} → {update_info['latest']}"
+                    )
+                    print("Run 'llll flash' to update.")
+                    print()
                 return True
 
-            success = asyncio.run(run_detect())
+            success = asyncio.run(_closing_client(run_detect()))
             if not success:
                 print()
                 print("You can run detection later with: llll init --detect")
@@ -90,17 +118,24 @@ def init_workspace(detect: bool = False, hub_name: str | None = None) -> int:
     return 0
 
 
-def flash_firmware(check_only: bool = False, hub_name: str | None = None) -> int:
+def flash_firmware(
+    check_only: bool = False,
+    hub_name: str | None = None,
+    no_cache: bool = False,
+    assume_yes: bool = False,
+) -> int:
     """Flash Pybricks firmware to a LEGO hub.
 
     Args:
         check_only: Only check for updates, don't flash
         hub_name: Hub name for flashing (optional)
+        no_cache: Ignore any cached update check and query GitHub again
+        assume_yes: Answer yes to all confirmation prompts
 
     Returns:
         Exit code (0 = success)
     """
-    import subprocess
+    import asyncio
     import tempfile
     from . import config, firmware
 
@@ -124,12 +159,19 @@ def flash_firmware(check_only: bool = False, hub_name: str | None = None) -> int
 
     # Check for updates
     print("Checking for firmware updates...")
-    update_info = firmware.check_update_available(current_version, hub_type)
+    update_info = asyncio.run(_closing_client(
+        firmware.cached_check_update_available(
+            current_version, hub_type, refresh=no_cache
+        )
+    ))
 
     if "error" in update_info:
         print(f"❌ {update_info['error']}")
         return 1
 
+    if update_info.get("stale"):
+        print("⚠️  Could not reach GitHub; using cached release info, which may be out of date.")
+
     latest_version = update_info["latest"]
     print(f"Latest Pybricks version: {latest_version}")
     print()
@@ -157,8 +199,7 @@ def flash_firmware(check_only: bool = False, hub_name: str | None = None) -> int
     print("   - Do not disconnect during flashing")
     print()
 
-    response = input("Continue? [y/N]: ").strip().lower()
-    if response != "y":
+    if not _confirm("Continue? [y/N]: ", assume_yes=assume_yes):
         print("Cancelled.")
         return 1
 
@@ -168,40 +209,40 @@ def flash_firmware(check_only: bool = False, hub_name: str | None = None) -> int
         print(f"❌ Could not find firmware download for {hub_type}")
         return 1
 
-    print()
-    print(f"Downloading firmware...")
-    print(f"URL: {download_url}")
-
     with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
         tmp_path = Path(tmp.name)
 
     try:
-        success = firmware.download_firmware(download_url, tmp_path)
-        if not success:
-            print("❌ Download failed")
-            return 1
-
-        print(f"✓ Downloaded to {tmp_path}")
         print()
-
-        # Flash firmware using pybricksdev
-        print("Flashing firmware...")
+        print("Downloading firmware in the background...")
+        print(f"URL: {download_url}")
         print()
+
+        # Get the hub ready while the firmware downloads
         print("Make sure your hub is:")
         print("  1. Connected via USB")
         print("  2. In DFU mode (hold button while connecting)")
         print()
 
-        response = input("Hub ready? [y/N]: ").strip().lower()
-        if response != "y":
+        ready, success = _download_and_prompt(
+            download_url, tmp_path, assume_yes=assume_yes
+        )
+        if not ready:
             print("Cancelled.")
             return 1
 
+        if not success:
+            print("❌ Download failed")
+            return 1
+
+        print(f"✓ Downloaded to {tmp_path}")
         print()
-        cmd = ["pybricksdev", "flash", str(tmp_path)]
-        result = subprocess.run(cmd)
 
-        if result.returncode == 0:
+        # Flash firmware using pybricksdev
+        print("Flashing firmware...")
+        print()
+        flashed, error = firmware.flash(tmp_path)
+        if flashed:
             print()
             print("✓ Firmware flashed successfully!")
             print()
@@ -211,7 +252,7 @@ def flash_firmware(check_only: bool = False, hub_name: str | None = None) -> int
             return 0
         else:
             print()
-            print("❌ Flashing failed")
+            print(f"❌ Flashing failed: {error}" if error else "❌ Flashing failed")
             print()
             print("Common issues:")
             print("  - Hub not in DFU mode (hold button while connecting USB)")
@@ -225,6 +266,82 @@ def flash_firmware(check_only: bool = False, hub_name: str | None = None) -> int
             tmp_path.unlink()
 
 
+def _download_and_prompt(
+    url: str,
+    destination: Path,
+    assume_yes: bool = False,
+) -> tuple[bool, bool]:
+    """Download firmware while asking whether the hub is ready.
+
+    The download runs on its own event loop in a background thread, and the
+    prompt stays on the main thread so Ctrl-C interrupts it straight away.
+    If the user declines or interrupts, the download is cancelled.
+
+    Returns:
+        (ready, downloaded)
+    """
+    import asyncio
+    import threading
+    from . import firmware
+
+    loop = asyncio.new_event_loop()
+    download = loop.create_task(
+        _closing_client(firmware.download_firmware(url, destination))
+    )
+
+    def run():
+        try:
+            loop.run_until_complete(download)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        if not _confirm("Hub ready? [y/N]: ", assume_yes=assume_yes):
+            return False, False
+        thread.join()
+        return True, download.result()
+    finally:
+        if thread.is_alive():
+            try:
+                loop.call_soon_threadsafe(download.cancel)
+            except RuntimeError:
+                # The download finished and closed its loop in the meantime
+                pass
+            # Let the download close the file before the caller removes it
+            thread.join()
+
+
+async def _closing_client(coro):
+    """Await coro, then close the HTTP client it used on this event loop."""
+    from . import firmware
+
+    try:
+        return await coro
+    finally:
+        await firmware.close_client()
+
+
+def _confirm(prompt: str, default: bool = False, assume_yes: bool = False) -> bool:
+    """Ask a yes/no question.
+
+    Returns True without asking if assume_yes is set. When stdin is not a
+    TTY (CI, agents), returns default instead of blocking on input().
+    """
+    import sys
+
+    if assume_yes:
+        print(f"{prompt}y")
+        return True
+    if not sys.stdin.isatty():
+        print(f"{prompt}{'y' if default else 'n'} (non-interactive; pass --yes to confirm)")
+        return default
+    return input(prompt).strip().lower() == "y"
+
+
 def _create_mcp_json(path: Path, cwd: Path):
     """Create .mcp.json configuration file."""
     config = {
@@ -237,12 +354,28 @@ def _create_mcp_json(path: Path, cwd: Path):
         }
     }
 
-    path.write_text(json.dumps(config, indent=2) + "\n")
-    print(f"✓ Created {path.relative_to(cwd)}")
+    from .config import write_if_changed
+
+    try:
+        import orjson
+        data = orjson.dumps(
+            config, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        )
+    except ImportError:
+        import json
+        data = (json.dumps(config, indent=2) + "\n").encode()
+
+    if write_if_changed(path, data):
+        print(f"✓ Created {path.relative_to(cwd)}")
+    else:
+        print(f"✓ {path.relative_to(cwd)} is already up to date")
 
 
-def main():
-    """Main CLI entry point."""
+@functools.cache
+def _build_parser():
+    """Build the argparse parser (once per process)."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         prog="llll",
         description="LEGO lin la loop — MCP server for LEGO Mindstorms via Pybricks",
@@ -265,6 +398,17 @@ def main():
         type=str,
         help="Bluetooth name of the hub for detection",
     )
+    init_parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore the cached detection result and query the hub again",
+    )
+    init_parser.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="Answer yes to all prompts (e.g. overwrite .mcp.json)",
+    )
 
     # llll flash
     flash_parser = subparsers.add_parser(
@@ -281,13 +425,47 @@ def main():
         type=str,
         help="Bluetooth name of the hub (optional)",
     )
+    flash_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the cached update check and query GitHub again",
+    )
+    flash_parser.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="Answer yes to all prompts, including the flash confirmation",
+    )
+
+    return parser
 
-    args = parser.parse_args()
+
+def main():
+    """Main CLI entry point."""
+    import sys
+
+    if len(sys.argv) == 1:
+        # No arguments = run the MCP server, skipping argparse entirely
+        from .server import main as server_main
+        server_main()
+        return 0
+
+    args = _build_parser().parse_args()
 
     if args.command == "init":
-        return init_workspace(detect=args.detect, hub_name=args.hub_name)
+        return init_workspace(
+            detect=args.detect,
+            hub_name=args.hub_name,
+            fresh=args.fresh,
+            assume_yes=args.yes,
+        )
     elif args.command == "flash":
-        return flash_firmware(check_only=args.check, hub_name=getattr(args, "hub_name", None))
+        return flash_firmware(
+            check_only=args.check,
+            hub_name=getattr(args, "hub_name", None),
+            no_cache=args.no_cache,
+            assume_yes=args.yes,
+        )
     else:
         # No subcommand = run the MCP server
         from .server import main as server_main
@@ -296,4 +474,6 @@ def main():
 
 
 if __name__ == "__main__":
+    import sys
+
     sys.exit(main())
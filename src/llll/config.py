@@ -1,5 +1,7 @@
 """Configuration management for llll.toml."""
 
+import json
+import os
 import tomllib
 from pathlib import Path
 
@@ -10,6 +12,12 @@ def config_path(project_dir: Path) -> Path:
     return project_dir / CONFIG_FILENAME
 
 
+def cache_dir() -> Path:
+    """Get llll's per-user cache directory."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "llll"
+
+
 def load_config(project_dir: Path) -> dict | None:
     """Load llll.toml if it exists. Returns None if not found."""
     path = config_path(project_dir)
@@ -41,7 +49,7 @@ def save_config(project_dir: Path, data: dict) -> Path:
         if hub.get("pybricks_version"):
             lines.append(f"pybricks_version = {_toml_value(hub['pybricks_version'])}")
         if hub.get("battery_voltage"):
-            lines.append(f"battery_voltage = {hub['battery_voltage']}")
+            lines.append(f"battery_voltage = {_toml_value(hub['battery_voltage'])}")
         lines.append("")
 
         # Ports
@@ -53,16 +61,35 @@ def save_config(project_dir: Path, data: dict) -> Path:
                     lines.append(
                         f'{port_letter} = {{device = {_toml_value(port_info["device"])}'
                         f', class = {_toml_value(port_info["class"])}'
-                        f', id = {port_info["id"]}}}'
+                        f', id = {_toml_value(port_info["id"])}}}'
                     )
                 else:
                     lines.append(f"{port_letter} = {_toml_value(port_info)}")
             lines.append("")
 
-    path.write_text("\n".join(lines) + "\n")
+    # Trailing empty entry gives the file its final newline in the same join
+    lines.append("")
+    write_if_changed(path, "\n".join(lines).encode())
     return path
 
 
+def write_if_changed(path: Path, data: bytes) -> bool:
+    """Atomically write data to path, skipping the write if nothing changed.
+
+    Returns True if the file was written, False if it already matched.
+    """
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
 def discovery_to_config(discovery_data: dict) -> dict:
     """Convert discovery output to config format."""
     ports = {}
@@ -130,11 +157,20 @@ def format_hub_info(cfg: dict) -> str:
 def _toml_value(v) -> str:
     """Format a Python value as a TOML literal."""
     if isinstance(v, str):
-        return f'"{v}"'
+        return _toml_string(v)
     if isinstance(v, bool):
         return "true" if v else "false"
     if isinstance(v, int):
         return str(v)
     if isinstance(v, float):
         return str(v)
-    return f'"{v}"'
+    return _toml_string(str(v))
+
+
+def _toml_string(s: str) -> str:
+    """Format a string as a TOML basic string, escaping quotes and control chars.
+
+    JSON string escapes are a subset of TOML's, except that TOML also
+    requires DEL to be escaped.
+    """
+    return json.dumps(s, ensure_ascii=False).replace("\x7f", "\\u007f")
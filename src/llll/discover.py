@@ -1,10 +1,17 @@
 """Hub discovery — detect hub type, name, battery, and connected devices."""
 
+import hashlib
 import json
-import re
+import os
+import time
 from pathlib import Path
 
-from . import runner
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+from . import config, runner
 
 # Device ID → (human name, pybricks class, module)
 DEVICE_MAP = {
@@ -28,6 +35,18 @@ DEVICE_MAP = {
     76: ("Technic Large Angular Motor", "Motor", "pybricks.pupdevices"),
 }
 
+# Device ID → port info fields, prebuilt so enrichment is a single update()
+DEVICE_ENRICH = {
+    dev_id: {"device_name": name, "pybricks_class": cls, "pybricks_module": mod}
+    for dev_id, (name, cls, mod) in DEVICE_MAP.items()
+}
+
+# How long a successful discovery result is reused, in seconds
+DISCOVERY_CACHE_TTL = 300
+
+# Prefix of the line the discovery program prints its results on
+DISCOVERY_MARKER = "LLLL_DETECT:"
+
 # The MicroPython program that runs on the hub to detect everything.
 # Output is a single line: LLLL_DETECT:<json>
 DISCOVERY_PROGRAM = '''\
@@ -111,69 +130,142 @@ result = {
 print("LLLL_DETECT:" + ujson.dumps(result))
 '''
 
+# Cache subdirectory for the materialized discovery program; the hash
+# invalidates on change while the filename (and so the log name) stays stable
+_DISCOVERY_PROGRAM_DIR = (
+    "discover-"
+    + hashlib.blake2b(DISCOVERY_PROGRAM.encode(), digest_size=8).hexdigest()
+)
+
 
 def parse_discovery_output(output: str) -> dict | None:
     """Parse the structured output from the discovery program."""
-    for line in output.splitlines():
-        if line.startswith("LLLL_DETECT:"):
-            payload = line[len("LLLL_DETECT:"):]
-            data = json.loads(payload)
-
-            if "error" in data:
-                return data
-
-            # Enrich port data with human-readable names
-            for port_info in data.get("ports", []):
-                dev_id = port_info.get("device_id")
-                if dev_id is not None and dev_id in DEVICE_MAP:
-                    name, cls, mod = DEVICE_MAP[dev_id]
-                    port_info["device_name"] = name
-                    port_info["pybricks_class"] = cls
-                    port_info["pybricks_module"] = mod
-                elif dev_id is not None:
-                    port_info["device_name"] = f"Unknown (ID {dev_id})"
-
-            return data
+    # The marker line is printed last, so scan from the end without splitting
+    idx = output.rfind(DISCOVERY_MARKER)
+    if idx < 0:
+        return None
+
+    end = output.find("\n", idx)
+    payload = output[idx + len(DISCOVERY_MARKER):end if end != -1 else None]
+    data = _json_loads(payload)
+
+    if "error" in data:
+        return data
+
+    # Enrich port data with human-readable names
+    for port_info in data.get("ports", []):
+        dev_id = port_info.get("device_id")
+        if dev_id is not None and dev_id in DEVICE_ENRICH:
+            port_info.update(DEVICE_ENRICH[dev_id])
+        elif dev_id is not None:
+            port_info["device_name"] = f"Unknown (ID {dev_id})"
+
+    return data
+
+
+def _discovery_program_path() -> Path:
+    """Write the discovery program to llll's cache dir and return its path.
+
+    The file lives in the per-user cache directory, in a subdirectory named
+    after a hash of the program, so it is written once and reused until the
+    program changes. It is only reused if its contents still match.
+    """
+    data = DISCOVERY_PROGRAM.encode()
+    path = config.cache_dir() / _DISCOVERY_PROGRAM_DIR / "_llll_discover.py"
+    try:
+        if path.read_bytes() == data:
+            return path
+    except OSError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return path
+
+
+def _discovery_cache_path(project_dir: Path) -> Path:
+    return project_dir / ".llll_cache" / "discovery.json"
 
+
+def _load_cached_discovery(project_dir: Path, key: str) -> dict | None:
+    """Return a cached discovery result for key if it is still fresh."""
+    try:
+        cache = _json_loads(_discovery_cache_path(project_dir).read_bytes())
+        entry = cache[key]
+        if time.time() - entry["fetched_at"] < DISCOVERY_CACHE_TTL:
+            return entry["data"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
     return None
 
 
+def _save_cached_discovery(project_dir: Path, key: str, data: dict):
+    """Store a discovery result for key, keeping other hubs' entries."""
+    path = _discovery_cache_path(project_dir)
+    try:
+        cache = _json_loads(path.read_bytes())
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+
+    cache[key] = {"fetched_at": time.time(), "data": data}
+    try:
+        if not path.parent.exists():
+            path.parent.mkdir()
+            # Keep the cache out of version control, like .pytest_cache
+            (path.parent / ".gitignore").write_text("*\n")
+        path.write_text(json.dumps(cache))
+    except OSError:
+        pass
+
+
 async def run_discovery(
     project_dir: Path,
     hub_name: str | None = None,
     timeout: int = 30,
+    fresh: bool = False,
 ) -> dict:
-    """Run the discovery program on the hub and return parsed results."""
-    # Write the discovery program to a temp file
-    discover_file = project_dir / "_llll_discover.py"
-    try:
-        discover_file.write_text(DISCOVERY_PROGRAM)
-
-        result = await runner.run_program(
-            str(discover_file.relative_to(project_dir)),
-            project_dir,
-            hub_name=hub_name,
-            timeout=timeout,
-        )
-
-        if result.get("error"):
-            return {"error": result["error"]}
-
-        if not result["success"]:
-            return {
-                "error": f"Discovery program failed (exit code {result.get('exit_code')})",
-                "output": result.get("output", ""),
-            }
-
-        parsed = parse_discovery_output(result["output"])
-        if parsed is None:
-            return {
-                "error": "Could not parse discovery output",
-                "output": result.get("output", ""),
-            }
-
-        return parsed
-
-    finally:
-        if discover_file.exists():
-            discover_file.unlink()
+    """Run the discovery program on the hub and return parsed results.
+
+    Successful results are cached per hub name in .llll_cache/ (which ignores
+    itself in git) for DISCOVERY_CACHE_TTL seconds, and a result served from
+    the cache has "cached": True. Pass fresh=True to always query the hub.
+    """
+    cache_key = hub_name or "default"
+    if not fresh:
+        cached = _load_cached_discovery(project_dir, cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    discover_file = _discovery_program_path()
+
+    result = await runner.run_program(
+        str(discover_file),
+        project_dir,
+        hub_name=hub_name,
+        timeout=timeout,
+    )
+
+    if result.get("error"):
+        return {"error": result["error"]}
+
+    if not result["success"]:
+        return {
+            "error": f"Discovery program failed (exit code {result.get('exit_code')})",
+            "output": result.get("output", ""),
+        }
+
+    parsed = parse_discovery_output(result["output"])
+    if parsed is None:
+        return {
+            "error": "Could not parse discovery output",
+            "output": result.get("output", ""),
+        }
+
+    if "error" not in parsed:
+        _save_cached_discovery(project_dir, cache_key, parsed)
+
+    return parsed
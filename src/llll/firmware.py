@@ -1,10 +1,18 @@
 """Firmware version checking and flashing for Pybricks."""
 
+import asyncio
+import functools
 import json
-import urllib.request
+import re
+import subprocess
+import time
 from pathlib import Path
 from typing import Tuple
 
+import httpx
+
+from . import config
+
 # Map hub types to firmware filename patterns
 HUB_FIRMWARE_MAP = {
     "InventorHub": "primehub",
@@ -15,9 +23,65 @@ HUB_FIRMWARE_MAP = {
     "MoveHub": "movehub",
 }
 
+# Leading dotted version number; anything after it (e.g. "b1", "rc2") is ignored
+_VERSION_RE = re.compile(r"\d+(?:\.\d+)*")
+
 GITHUB_API_URL = "https://api.github.com/repos/pybricks/pybricks-micropython/releases/latest"
 
+# Bytes read per chunk when downloading firmware
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+
+# How long a cached update check stays valid, in seconds
+UPDATE_CHECK_TTL = 3600
+
+# How long a fetched release is reused before asking GitHub again, in seconds
+RELEASE_CACHE_TTL = 3600
+
+# Release info fields kept in release.json; the lookup indexes are derived
+_PERSISTED_RELEASE_FIELDS = (
+    "version", "url", "assets", "published_at", "etag", "fetched_at", "expires_at",
+)
+
+# In-process copy of the latest release and its time.monotonic() expiry
+_release_cache: dict = {"data": None, "expires": 0.0}
+
+# Shared HTTP client and the event loop it belongs to (see _get_client)
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, so requests reuse keep-alive connections.
+
+    httpx connections are tied to the event loop that opened them, so a new
+    client is created whenever the running loop changes (e.g. separate
+    asyncio.run() calls in the CLI).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=4),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client if it belongs to the running loop.
+
+    Await this before an event loop that used the client finishes (e.g. at
+    the end of each asyncio.run() in the CLI), so pooled connections are
+    released instead of being left attached to a closed loop.
+    """
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        client, _client, _client_loop = _client, None, None
+        await client.aclose()
+
 
+@functools.lru_cache(maxsize=256)
 def parse_version(version_str: str) -> Tuple[int, ...]:
     """Parse version string to tuple of integers for comparison.
 
@@ -26,19 +90,13 @@ def parse_version(version_str: str) -> Tuple[int, ...]:
         "3.6.0b1" -> (3, 6, 0)  # ignores pre-release suffix
         "unknown" -> (0, 0, 0)
     """
-    if not version_str or version_str == "unknown":
-        return (0, 0, 0)
-
-    # Remove any pre-release suffixes (e.g., "3.6.0b1" -> "3.6.0")
-    version_str = version_str.split("a")[0].split("b")[0].split("rc")[0]
-
-    try:
-        parts = version_str.split(".")
-        return tuple(int(p) for p in parts)
-    except (ValueError, AttributeError):
+    match = _VERSION_RE.match(version_str or "")
+    if not match:
         return (0, 0, 0)
+    return tuple(map(int, match.group().split(".")))
 
 
+@functools.lru_cache(maxsize=256)
 def compare_versions(current: str, latest: str) -> int:
     """Compare two version strings.
 
@@ -47,40 +105,121 @@ def compare_versions(current: str, latest: str) -> int:
          0 if current == latest (up to date)
          1 if current > latest (newer than release)
     """
-    current_tuple = parse_version(current)
-    latest_tuple = parse_version(latest)
+    a, b = parse_version(current), parse_version(latest)
+    return (a > b) - (a < b)
+
+
+def release_cache_path() -> Path:
+    """Get the on-disk cache file for the latest release info."""
+    return config.cache_dir() / "release.json"
+
+
+def _load_release_cache() -> dict | None:
+    try:
+        release = json.loads(release_cache_path().read_text())
+        return _index_release(release)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _save_release_cache(release: dict):
+    # The lookup indexes are rebuilt on load, so assets are stored only once
+    path = release_cache_path()
+    data = {k: release[k] for k in _PERSISTED_RELEASE_FIELDS if k in release}
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data))
+    except OSError:
+        pass
+
 
-    if current_tuple < latest_tuple:
-        return -1
-    elif current_tuple > latest_tuple:
-        return 1
-    else:
-        return 0
+def _index_release(release: dict) -> dict:
+    """Add the assets_by_name and firmware_by_hub lookups to release info."""
+    assets_by_name = {a.get("name"): a for a in release.get("assets", [])}
+    release["assets_by_name"] = assets_by_name
+    release["firmware_by_hub"] = _index_firmware(release["version"], assets_by_name)
+    return release
+
+
+def _release_expiry(response: httpx.Response, fetched_at: float) -> float:
+    """Work out when a fetched release should be re-checked.
+
+    Normally RELEASE_CACHE_TTL after fetching, but if the GitHub rate limit
+    is exhausted, not before it resets.
+    """
+    expires_at = fetched_at + RELEASE_CACHE_TTL
+    try:
+        if int(response.headers["X-RateLimit-Remaining"]) <= 1:
+            expires_at = max(expires_at, float(response.headers["X-RateLimit-Reset"]))
+    except (KeyError, ValueError):
+        pass
+    return expires_at
 
 
-def get_latest_release() -> dict | None:
+async def get_latest_release(refresh: bool = False) -> dict | None:
     """Fetch latest Pybricks release info from GitHub API.
 
+    Results are cached in memory and on disk for RELEASE_CACHE_TTL seconds.
+    Once stale, the request is sent with the cached ETag so an unchanged
+    release costs a 304 (which doesn't count against GitHub's rate limit).
+    If GitHub can't be reached, the last cached release is returned.
+
+    Args:
+        refresh: Ignore the TTL and revalidate with GitHub
+
     Returns:
-        Dict with 'version', 'url', 'assets' or None if fetch failed.
+        Dict with 'version', 'url', 'assets', 'assets_by_name',
+        'firmware_by_hub', 'published_at', 'etag', 'fetched_at' and
+        'expires_at', or None if fetch failed and nothing is cached. If the
+        fetch failed and a cached release is returned, 'stale' is True.
     """
+    if not refresh and _release_cache["data"] is not None:
+        if time.monotonic() < _release_cache["expires"]:
+            return _release_cache["data"]
+
+    cached = _load_release_cache()
+    if not refresh and cached and time.time() < cached.get("expires_at", 0):
+        _release_cache["data"] = cached
+        _release_cache["expires"] = time.monotonic() + cached["expires_at"] - time.time()
+        return cached
+
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
     try:
-        with urllib.request.urlopen(GITHUB_API_URL, timeout=10) as response:
-            data = json.loads(response.read().decode())
+        response = await _get_client().get(GITHUB_API_URL, headers=headers, timeout=10)
+        fetched_at = time.time()
+
+        if response.status_code == 304 and cached:
+            release = cached
+        else:
+            response.raise_for_status()
+            data = response.json()
 
             # Extract version from tag (e.g., "v3.6.1" -> "3.6.1")
             tag = data.get("tag_name", "")
-            version = tag.lstrip("v")
-
-            return {
-                "version": version,
+            release = _index_release({
+                "version": tag.lstrip("v"),
                 "url": data.get("html_url"),
                 "assets": data.get("assets", []),
                 "published_at": data.get("published_at"),
-            }
-    except Exception as e:
-        # Network errors, API rate limits, etc.
-        return None
+                "etag": response.headers.get("ETag"),
+            })
+
+        release["fetched_at"] = fetched_at
+        release["expires_at"] = _release_expiry(response, fetched_at)
+    except Exception:
+        # Network errors, API rate limits, etc. Fall back to the last known
+        # release, however old, but say so
+        if cached:
+            cached["stale"] = True
+        return cached
+
+    _save_release_cache(release)
+    _release_cache["data"] = release
+    _release_cache["expires"] = time.monotonic() + release["expires_at"] - fetched_at
+    return release
 
 
 def get_firmware_filename(hub_type: str, version: str) -> str | None:
@@ -110,20 +249,36 @@ def get_firmware_download_url(hub_type: str, release_info: dict) -> str | None:
     Returns:
         Download URL or None if not found.
     """
-    filename = get_firmware_filename(hub_type, release_info["version"])
-    if not filename:
-        return None
+    firmware_by_hub = release_info.get("firmware_by_hub")
+    if firmware_by_hub is None:
+        # Release info from an older cache file, or built by hand
+        assets_by_name = release_info.get("assets_by_name")
+        if assets_by_name is None:
+            assets_by_name = {a.get("name"): a for a in release_info.get("assets", [])}
+        firmware_by_hub = _index_firmware(release_info["version"], assets_by_name)
 
-    for asset in release_info.get("assets", []):
-        if asset.get("name") == filename:
-            return asset.get("browser_download_url")
+    return firmware_by_hub.get(hub_type)
 
-    return None
+
+def _index_firmware(version: str, assets_by_name: dict) -> dict[str, str]:
+    """Map every known hub type to its firmware download URL in a release.
+
+    Hub types whose firmware isn't among the release assets are left out.
+    """
+    firmware_by_hub = {}
+    for hub_type in HUB_FIRMWARE_MAP:
+        asset = assets_by_name.get(get_firmware_filename(hub_type, version))
+        if asset and asset.get("browser_download_url"):
+            firmware_by_hub[hub_type] = asset["browser_download_url"]
+    return firmware_by_hub
 
 
-def download_firmware(url: str, destination: Path) -> bool:
+async def download_firmware(url: str, destination: Path) -> bool:
     """Download firmware file from URL to destination.
 
+    The body is streamed to disk in chunks. Cancel the awaiting task to
+    abort a download in progress.
+
     Args:
         url: Download URL
         destination: Path to save the file
@@ -132,25 +287,59 @@ def download_firmware(url: str, destination: Path) -> bool:
         True if successful, False otherwise.
     """
     try:
-        with urllib.request.urlopen(url, timeout=60) as response:
-            destination.write_bytes(response.read())
+        async with _get_client().stream("GET", url, timeout=60) as response:
+            response.raise_for_status()
+            with open(destination, "wb") as f:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
         return True
     except Exception:
         return False
 
 
-def check_update_available(current_version: str, hub_type: str) -> dict:
+async def check_update_available(
+    current_version: str,
+    hub_type: str,
+    refresh: bool = False,
+) -> dict:
     """Check if a firmware update is available.
 
     Args:
         current_version: Currently installed version (e.g., "3.5.0")
         hub_type: Hub type (e.g., "InventorHub")
+        refresh: Revalidate the release info with GitHub even if cached
+
+    Returns:
+        Dict with 'available', 'current', 'latest', 'download_url', 'release_url'.
+        'stale' is set if GitHub couldn't be reached and older cached release
+        info was used instead.
+    """
+    results = await check_update_available_bulk({hub_type: current_version}, refresh)
+    return results[hub_type]
+
+
+async def check_update_available_bulk(
+    current_versions: dict[str, str],
+    refresh: bool = False,
+) -> dict[str, dict]:
+    """Check several hubs for firmware updates against one release fetch.
+
+    Args:
+        current_versions: Hub type → currently installed version
+        refresh: Revalidate the release info with GitHub even if cached
 
     Returns:
-        Dict with 'available', 'current', 'latest', 'download_url', 'release_url'
+        Hub type → same dict as check_update_available
     """
-    release = get_latest_release()
+    release = await get_latest_release(refresh=refresh)
+    return {
+        hub_type: _update_info(current_version, hub_type, release)
+        for hub_type, current_version in current_versions.items()
+    }
+
 
+def _update_info(current_version: str, hub_type: str, release: dict | None) -> dict:
+    """Compare one hub's version against an already fetched release."""
     if not release:
         return {
             "available": False,
@@ -174,4 +363,89 @@ def check_update_available(current_version: str, hub_type: str) -> dict:
         download_url = get_firmware_download_url(hub_type, release)
         result["download_url"] = download_url
 
+    if release.get("stale"):
+        result["stale"] = True
+
     return result
+
+
+def update_cache_path(hub_type: str) -> Path:
+    """Get the on-disk cache file for a hub type's update check."""
+    return config.cache_dir() / f"firmware_{hub_type}.json"
+
+
+async def cached_check_update_available(
+    current_version: str,
+    hub_type: str,
+    refresh: bool = False,
+) -> dict:
+    """Like check_update_available, but reuses a recent result from disk.
+
+    Results are cached per hub type for UPDATE_CHECK_TTL seconds. A cached
+    result is only reused if it was computed for the same current version.
+    Failed checks, and checks answered from stale release info because
+    GitHub couldn't be reached, are never cached.
+
+    Args:
+        current_version: Currently installed version (e.g., "3.5.0")
+        hub_type: Hub type (e.g., "InventorHub")
+        refresh: Ignore any cached result and check again
+
+    Returns:
+        Same dict as check_update_available.
+    """
+    path = update_cache_path(hub_type)
+
+    if not refresh:
+        try:
+            if time.time() - path.stat().st_mtime < UPDATE_CHECK_TTL:
+                cached = json.loads(path.read_text())
+                if cached.get("current") == current_version:
+                    return cached
+        except (OSError, ValueError):
+            pass
+
+    result = await check_update_available(current_version, hub_type, refresh=refresh)
+
+    if "error" not in result and not result.get("stale"):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(result))
+        except OSError:
+            pass
+
+    return result
+
+
+def flash(firmware_path: Path) -> tuple[bool, str | None]:
+    """Flash a firmware zip to a hub in DFU mode using pybricksdev.
+
+    Calls pybricksdev's flash routine in-process to avoid starting a second
+    Python interpreter. Falls back to the pybricksdev CLI if the library
+    API is unavailable (e.g. pybricksdev installed separately via pipx).
+
+    Args:
+        firmware_path: Path to the downloaded firmware zip
+
+    Returns:
+        (success, error) where error describes the failure, if known.
+    """
+    try:
+        from pybricksdev.cli.flash import flash_firmware as pybricksdev_flash
+    except ImportError:
+        try:
+            result = subprocess.run(["pybricksdev", "flash", str(firmware_path)])
+        except FileNotFoundError:
+            return False, "pybricksdev not found"
+        return result.returncode == 0, None
+
+    try:
+        with open(firmware_path, "rb") as f:
+            asyncio.run(pybricksdev_flash(f, None))
+    except SystemExit as e:
+        # pybricksdev reports DFU failures with exit(1), and its dfu-util
+        # path ends in exit(returncode) even on success
+        return e.code in (None, 0), None
+    except Exception as e:
+        return False, str(e)
+    return True, None
@@ -1,27 +1,52 @@
 """Log file management for llll runs."""
 
+import os
+from datetime import datetime, timezone
 from pathlib import Path
 
 
 def list_logs(project_dir: Path) -> list[dict]:
-    """List all log files, most recent first."""
+    """List all log files, most recently modified first.
+
+    Each entry has the file name, size in bytes, and mtime (ISO 8601, UTC).
+    """
     logs_dir = project_dir / "logs"
     if not logs_dir.exists():
         return []
 
-    logs = []
-    for f in sorted(logs_dir.glob("*.log"), reverse=True):
-        if f.name == "latest.log":
-            continue
-        logs.append({
-            "file": f.name,
-            "size": f.stat().st_size,
-        })
-    return logs
+    # DirEntry caches what the directory read already returned; latest.log
+    # is skipped before its (symlink) target is ever stat()ed
+    entries = []
+    with os.scandir(logs_dir) as it:
+        for e in it:
+            if e.name.endswith(".log") and e.name != "latest.log":
+                st = e.stat()
+                entries.append((st.st_mtime_ns, e.name, st.st_size))
+
+    # Newest first by modification time, not by the timestamp in the name
+    entries.sort(reverse=True)
+
+    return [
+        {
+            "file": name,
+            "size": size,
+            "mtime": datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).isoformat(),
+        }
+        for mtime_ns, name, size in entries
+    ]
 
 
-def read_log(project_dir: Path, log_name: str | None = None) -> str:
-    """Read a log file. Reads latest.log if no name specified."""
+def read_log(
+    project_dir: Path,
+    log_name: str | None = None,
+    tail_bytes: int = 64_000,
+) -> str:
+    """Read a log file. Reads latest.log if no name specified.
+
+    Logs larger than tail_bytes are truncated to their last tail_bytes bytes,
+    read with a seek from the end rather than loading the whole file.
+    Pass tail_bytes=0 to read the whole log.
+    """
     logs_dir = project_dir / "logs"
 
     if log_name:
@@ -34,4 +59,12 @@ def read_log(project_dir: Path, log_name: str | None = None) -> str:
             return f"Log not found: {log_name}"
         return "No logs yet. Run a program first."
 
-    return log_file.read_text()
+    size = log_file.stat().st_size
+    if tail_bytes <= 0 or size <= tail_bytes:
+        return log_file.read_bytes().decode("utf-8", errors="replace")
+
+    with open(log_file, "rb") as f:
+        f.seek(-tail_bytes, os.SEEK_END)
+        data = f.read()
+    truncated = size - tail_bytes
+    return f"...[truncated {truncated} bytes]...\n" + data.decode("utf-8", errors="replace")
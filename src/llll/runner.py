@@ -1,9 +1,14 @@
 """Run MicroPython programs on a LEGO hub via pybricksdev."""
 
 import asyncio
+import codecs
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+# Bytes read back from the log file per chunk
+READ_CHUNK_SIZE = 1 << 16
+
 
 async def run_program(
     file_path: str,
@@ -29,10 +34,8 @@ async def run_program(
     logs_dir = project_dir / "logs"
     logs_dir.mkdir(exist_ok=True)
 
-    # Log file path
-    program_name = program.stem
-    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    log_file = logs_dir / f"{program_name}_{ts}.log"
+    # One clock read names the log file and stamps its header
+    start_time = datetime.now(timezone.utc)
 
     # Build the pybricksdev command
     cmd = ["pybricksdev", "run", "ble"]
@@ -42,59 +45,75 @@ async def run_program(
         cmd.append("--no-start")
     cmd.append(str(program))
 
-    start_time = datetime.now(timezone.utc)
+    header = [
+        "=== llll run log ===\n",
+        f"program: {file_path}\n",
+        f"timestamp: {start_time.isoformat()}\n",
+    ]
+    if hub_name:
+        header.append(f"hub: {hub_name}\n")
+    header.append("=== output ===\n")
+    header_bytes = "".join(header).encode()
 
+    # pybricksdev writes straight into the log file through this fd, so the
+    # kernel does the copying and the log can be tailed during the run.
+    # O_APPEND keeps our header/footer and the child's writes in order.
+    ts = start_time.strftime("%Y%m%d_%H%M%S")
+    fd, log_name = _create_log(logs_dir, f"{program.stem}_{ts}")
+    log_file = logs_dir / log_name
     try:
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-        )
-    except FileNotFoundError:
-        return {
-            "success": False,
-            "error": "pybricksdev not found. Install it with: pip install pybricksdev",
-            "output": "",
-            "log_file": None,
-        }
+        await asyncio.to_thread(_write_all, fd, header_bytes)
 
-    timed_out = False
-    try:
-        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
-        output = stdout.decode("utf-8", errors="replace")
-        exit_code = proc.returncode
-    except asyncio.TimeoutError:
-        proc.kill()
-        stdout, _ = await proc.communicate()
-        output = stdout.decode("utf-8", errors="replace")
-        exit_code = -1
-        timed_out = True
-
-    end_time = datetime.now(timezone.utc)
-    duration = (end_time - start_time).total_seconds()
-
-    # Write log file
-    with open(log_file, "w") as f:
-        f.write("=== llll run log ===\n")
-        f.write(f"program: {file_path}\n")
-        f.write(f"timestamp: {start_time.isoformat()}\n")
-        if hub_name:
-            f.write(f"hub: {hub_name}\n")
-        f.write("=== output ===\n")
-        f.write(output)
-        if not output.endswith("\n"):
-            f.write("\n")
-        f.write("=== end ===\n")
-        f.write(f"exit_code: {exit_code}\n")
-        f.write(f"duration: {duration:.1f}s\n")
-        f.write(f"timed_out: {timed_out}\n")
-        f.write(f"finished: {end_time.isoformat()}\n")
-
-    # Update latest.log symlink
-    latest = logs_dir / "latest.log"
-    if latest.is_symlink() or latest.exists():
-        latest.unlink()
-    latest.symlink_to(log_file.name)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=fd,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+        except FileNotFoundError:
+            os.close(fd)
+            fd = None
+            log_file.unlink()
+            return {
+                "success": False,
+                "error": "pybricksdev not found. Install it with: pip install pybricksdev",
+                "output": "",
+                "log_file": None,
+            }
+
+        try:
+            await asyncio.to_thread(_update_latest_symlink, logs_dir, log_file)
+        except OSError:
+            # latest.log is a convenience; never abort a run that has started
+            pass
+
+        timed_out = False
+        try:
+            exit_code = await asyncio.wait_for(proc.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            exit_code = -1
+            timed_out = True
+
+        end_time = datetime.now(timezone.utc)
+        duration = (end_time - start_time).total_seconds()
+
+        # Everything after the header is the program's output
+        output = await asyncio.to_thread(_read_from, fd, len(header_bytes))
+
+        footer = "".join([
+            "" if output.endswith("\n") else "\n",
+            "=== end ===\n",
+            f"exit_code: {exit_code}\n",
+            f"duration: {duration:.1f}s\n",
+            f"timed_out: {timed_out}\n",
+            f"finished: {end_time.isoformat()}\n",
+        ])
+        await asyncio.to_thread(_write_all, fd, footer.encode())
+    finally:
+        if fd is not None:
+            os.close(fd)
 
     return {
         "success": exit_code == 0,
@@ -102,5 +121,59 @@ async def run_program(
         "timed_out": timed_out,
         "duration": duration,
         "output": output,
-        "log_file": str(log_file.relative_to(project_dir)),
+        "log_file": f"logs/{log_name}",
     }
+
+
+def _create_log(logs_dir: Path, base: str) -> tuple[int, str]:
+    """Create a new, empty log file named after base and open it for writing.
+
+    Runs started in the same second get a counter suffix, so no two runs
+    ever share a log file.
+
+    Returns:
+        (fd, log_name)
+    """
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_APPEND
+    n = 0
+    while True:
+        log_name = f"{base}.log" if n == 0 else f"{base}_{n}.log"
+        try:
+            return os.open(logs_dir / log_name, flags, 0o644), log_name
+        except FileExistsError:
+            n += 1
+
+
+def _write_all(fd: int, data: bytes):
+    """Write all of data to fd, retrying on short writes."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _read_from(fd: int, offset: int) -> str:
+    """Read and decode everything in fd from offset to the current end of file."""
+    # One incremental decoder carries split UTF-8 sequences across chunks
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts = []
+    while chunk := os.pread(fd, READ_CHUNK_SIZE, offset):
+        parts.append(decoder.decode(chunk))
+        offset += len(chunk)
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _update_latest_symlink(logs_dir: Path, log_file: Path):
+    """Point logs/latest.log at log_file.
+
+    The link is created under a name unique to this log and renamed over
+    latest.log, so concurrent runs swap it atomically instead of racing
+    between unlink and symlink.
+    """
+    tmp = logs_dir / f".latest.{log_file.name}.tmp"
+    tmp.symlink_to(log_file.name)
+    try:
+        os.replace(tmp, logs_dir / "latest.log")
+    except OSError:
+        tmp.unlink()
+        raise
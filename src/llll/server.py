@@ -1,5 +1,6 @@
 """llll MCP server — gives agents the ability to run programs on LEGO hubs."""
 
+import os
 from pathlib import Path
 
 from mcp.server.fastmcp import FastMCP
@@ -17,8 +18,8 @@ server = FastMCP(
         "filesystem, no networking, no REPL. Key modules: pybricks.hubs, "
         "pybricks.pupdevices, pybricks.parameters, pybricks.tools, "
         "pybricks.robotics. IMPORTANT: run_program returns only the last 500 "
-        "lines of output to conserve tokens. Use read_log() with offset/limit "
-        "to read specific parts of the full log if you need more context. "
+        "lines of output to conserve tokens. Use read_log() (tail_bytes=0 for "
+        "the whole file) to read the full log if you need more context. "
         "TIP: Write structured, parseable logs to help yourself debug. Use clear "
         "markers like '=== Test Start ===', consistent prefixes like 'ERROR:', "
         "and key-value pairs like 'Battery: 7200 mV'. This makes it easier to "
@@ -32,10 +33,33 @@ PROJECT_DIR = Path.cwd()
 # Full output is always saved to log file - use read_log to access complete output
 MAX_OUTPUT_LINES = 500
 
+# Directories never searched by list_programs (dot-directories are skipped too)
+IGNORED_DIRS = {"venv", "__pycache__"}
+
+# (llll.toml mtime_ns, parsed config) from the last load
+_config_cache: tuple[int, dict | None] | None = None
+
+# search dir → (mtime of every directory scanned, program listing)
+_listing_cache: dict[Path, tuple[dict[str, int], list[str]]] = {}
+
+
+def _load_config() -> dict | None:
+    """Load llll.toml, reusing the last parse while the file is unchanged."""
+    global _config_cache
+    try:
+        mtime = config.config_path(PROJECT_DIR).stat().st_mtime_ns
+    except FileNotFoundError:
+        _config_cache = None
+        return None
+
+    if _config_cache is None or _config_cache[0] != mtime:
+        _config_cache = (mtime, config.load_config(PROJECT_DIR))
+    return _config_cache[1]
+
 
 def _default_hub_name() -> str | None:
     """Get the default hub name from config, if set."""
-    cfg = config.load_config(PROJECT_DIR)
+    cfg = _load_config()
     if cfg and cfg.get("hubs"):
         # Use first hub's name
         hub = cfg["hubs"][0]
@@ -56,7 +80,8 @@ async def detect_hub(hub_name: str | None = None) -> str:
     Args:
         hub_name: Bluetooth name of the hub to detect (optional).
     """
-    data = await discover.run_discovery(PROJECT_DIR, hub_name=hub_name)
+    # Always query the hub: agents call this precisely when hardware changed
+    data = await discover.run_discovery(PROJECT_DIR, hub_name=hub_name, fresh=True)
 
     if "error" in data:
         msg = f"Detection failed: {data['error']}"
@@ -82,7 +107,7 @@ def get_hub_info() -> str:
 
     If no config exists yet, call detect_hub first.
     """
-    cfg = config.load_config(PROJECT_DIR)
+    cfg = _load_config()
     if cfg is None:
         return (
             "No llll.toml found. Call detect_hub to auto-detect the connected "
@@ -97,7 +122,7 @@ async def run_program(
     file: str,
     hub_name: str | None = None,
     timeout: int = 60,
-) -> str:
+) -> dict:
     """Run a MicroPython program on the LEGO hub via Bluetooth.
 
     Compiles, uploads, and executes the program, then returns the captured output.
@@ -105,7 +130,11 @@ async def run_program(
 
     Note: Output is truncated to the last 500 lines to conserve tokens. The full
     output is always saved to a log file. Use read_log() to access the complete output
-    if needed, with offset/limit parameters to read specific sections.
+    if needed, with tail_bytes=0 to read the whole file.
+
+    Returns a dict with: program, success, exit_code, timed_out, duration,
+    log_file, output, and when output was cut, output_truncated,
+    total_lines and hint. On failure to start, it has an error instead.
 
     Args:
         file: Path to the .py file, relative to the project root.
@@ -116,38 +145,7 @@ async def run_program(
         hub_name = _default_hub_name()
 
     result = await runner.run_program(file, PROJECT_DIR, hub_name, timeout)
-
-    if result.get("error"):
-        return f"Error: {result['error']}"
-
-    parts = [f"Program: {file}"]
-
-    if result["timed_out"]:
-        parts.append(f"TIMED OUT after {result['duration']:.1f}s")
-    else:
-        parts.append(f"Exit code: {result['exit_code']}")
-        parts.append(f"Duration: {result['duration']:.1f}s")
-
-    parts.append(f"Log: {result['log_file']}")
-    parts.append("")
-
-    # Truncate output to last N lines to save tokens
-    output = result["output"]
-    output_lines = output.splitlines()
-    total_lines = len(output_lines)
-
-    if total_lines > MAX_OUTPUT_LINES:
-        # Return tail of output
-        truncated_lines = output_lines[-MAX_OUTPUT_LINES:]
-        parts.append(f"--- Output (last {MAX_OUTPUT_LINES} of {total_lines} lines) ---")
-        parts.append(f"⚠️  Output truncated. Use read_log('{result['log_file']}') for full output.")
-        parts.append("")
-        parts.append("\n".join(truncated_lines))
-    else:
-        parts.append("--- Output ---")
-        parts.append(output)
-
-    return "\n".join(parts)
+    return _tool_result(file, result)
 
 
 @server.tool()
@@ -155,7 +153,7 @@ async def upload_program(
     file: str,
     hub_name: str | None = None,
     timeout: int = 60,
-) -> str:
+) -> dict:
     """Upload a MicroPython program to the LEGO hub without starting it.
 
     Compiles and uploads the program via Bluetooth, then disconnects immediately.
@@ -163,6 +161,8 @@ async def upload_program(
     client needs to connect to the hub after upload (e.g. for automated testing),
     or when you want to upload now and start manually via the hub button later.
 
+    Returns the same dict as run_program; success means the upload completed.
+
     Args:
         file: Path to the .py file, relative to the project root.
         hub_name: Bluetooth name of the hub (optional, uses config default if set).
@@ -172,82 +172,117 @@ async def upload_program(
         hub_name = _default_hub_name()
 
     result = await runner.run_program(file, PROJECT_DIR, hub_name, timeout, start=False)
+    return _tool_result(file, result)
 
+
+def _tool_result(file: str, result: dict) -> dict:
+    """Shape a runner result for a tool response, tail-truncating the output."""
     if result.get("error"):
-        return f"Error: {result['error']}"
+        return {"program": file, "success": False, "error": result["error"]}
 
-    parts = [f"Program: {file}"]
+    response = {"program": file, **result}
 
-    if result["timed_out"]:
-        parts.append(f"TIMED OUT after {result['duration']:.1f}s")
-    else:
-        status = "Uploaded" if result["success"] else "Upload failed"
-        parts.append(f"Status: {status} (exit code {result['exit_code']})")
-        parts.append(f"Duration: {result['duration']:.1f}s")
+    # Truncate output to last N lines to save tokens
+    output_lines = result["output"].splitlines()
+    total_lines = len(output_lines)
+    if total_lines > MAX_OUTPUT_LINES:
+        response["output"] = "\n".join(output_lines[-MAX_OUTPUT_LINES:])
+        response["output_truncated"] = True
+        response["total_lines"] = total_lines
+        log_name = Path(result["log_file"]).name
+        response["hint"] = f"Use read_log('{log_name}', tail_bytes=0) for full output."
+
+    return response
 
-    parts.append(f"Log: {result['log_file']}")
 
-    if result["output"].strip():
-        parts.append("")
-        parts.append("--- Output ---")
-        parts.append(result["output"])
+def _is_ignored(name: str) -> bool:
+    return name.startswith(".") or name in IGNORED_DIRS
 
-    return "\n".join(parts)
+
+def _scan_programs(search_dir: Path, rel_dir: Path) -> tuple[dict[str, int], list[str]]:
+    """Find .py files under search_dir, pruning ignored directories.
+
+    Returns the mtime of every directory visited (to validate the cache
+    later) and the program paths relative to the project root.
+    """
+    dir_mtimes = {}
+    programs = []
+    stack = [(str(search_dir), rel_dir)]
+    while stack:
+        path, rel = stack.pop()
+        dir_mtimes[path] = os.stat(path).st_mtime_ns
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if not _is_ignored(entry.name):
+                        stack.append((entry.path, rel / entry.name))
+                elif entry.name.endswith(".py") and not entry.name.startswith("."):
+                    programs.append(rel / entry.name)
+
+    programs.sort(key=lambda p: p.parts)
+    return dir_mtimes, [str(p) for p in programs]
+
+
+def _cache_is_fresh(dir_mtimes: dict[str, int]) -> bool:
+    """Check that no scanned directory has gained or lost entries."""
+    try:
+        return all(os.stat(d).st_mtime_ns == m for d, m in dir_mtimes.items())
+    except OSError:
+        return False
 
 
 @server.tool()
-def list_programs(directory: str = ".") -> str:
+def list_programs(directory: str = ".") -> dict:
     """List MicroPython (.py) program files in the project.
 
+    Returns {"files": [...]} with paths relative to the project root, or
+    {"error": ...} if the directory doesn't exist.
+
     Args:
         directory: Directory to search, relative to the project root. Default: project root.
     """
     search_dir = PROJECT_DIR / directory
     if not search_dir.exists():
-        return f"Directory not found: {directory}"
-
-    py_files = sorted(search_dir.rglob("*.py"))
-    if not py_files:
-        return f"No .py files found in {directory}"
+        return {"error": f"Directory not found: {directory}"}
 
-    lines = []
-    for f in py_files:
-        rel = f.relative_to(PROJECT_DIR)
-        rel_str = str(rel)
-        if any(part.startswith(".") for part in rel.parts):
-            continue
-        if "venv" in rel.parts or "__pycache__" in rel.parts:
-            continue
-        lines.append(str(rel))
+    rel_dir = search_dir.relative_to(PROJECT_DIR)
+    if any(_is_ignored(part) for part in rel_dir.parts):
+        return {"files": []}
 
-    if not lines:
-        return f"No .py files found in {directory}"
+    cached = _listing_cache.get(search_dir)
+    if cached and _cache_is_fresh(cached[0]):
+        lines = cached[1]
+    else:
+        dir_mtimes, lines = _scan_programs(search_dir, rel_dir)
+        _listing_cache[search_dir] = (dir_mtimes, lines)
 
-    return "\n".join(lines)
+    return {"files": list(lines)}
 
 
 @server.tool()
-def read_log(log_name: str | None = None) -> str:
+def read_log(log_name: str | None = None, tail_bytes: int = 64_000) -> str:
     """Read a log file from a previous run.
 
+    Long logs are truncated to their last tail_bytes bytes, which is usually
+    where the interesting output is.
+
     Args:
         log_name: Filename of the log (e.g. "hello_20260211_152707.log").
                   Omit to read the most recent log.
+        tail_bytes: Max bytes to return from the end of the log. Default 64000.
+                    Pass 0 to read the whole log.
     """
-    return logs.read_log(PROJECT_DIR, log_name)
+    return logs.read_log(PROJECT_DIR, log_name, tail_bytes)
 
 
 @server.tool()
-def list_run_logs() -> str:
-    """List all run log files, most recent first."""
-    entries = logs.list_logs(PROJECT_DIR)
-    if not entries:
-        return "No logs yet."
-
-    lines = []
-    for entry in entries:
-        lines.append(f"{entry['file']}  ({entry['size']} bytes)")
-    return "\n".join(lines)
+def list_run_logs() -> dict:
+    """List all run log files, most recently modified first.
+
+    Returns {"logs": [...]}, where each entry has the log's file name, size in
+    bytes, and mtime. The list is empty if there are no logs yet.
+    """
+    return {"logs": logs.list_logs(PROJECT_DIR)}
 
 
 def main():